@@ -2,20 +2,102 @@
 # -*- coding: utf-8 -*-
 
 import sys
+import gc
 import time
+import signal
+import queue
+import functools
+import itertools
 import threading
 import numpy as np
 import sounddevice as sd
 import soundfile as sf
 import re
 import subprocess
+import shutil
 import os
 import webbrowser
 import requests
 import json
 import uuid
+from collections import defaultdict, deque, namedtuple
+from enum import IntEnum
 from difflib import SequenceMatcher
 from shortcut_config import ShortcutConfig
+# 尝试导入rapidfuzz，如果失败则回退到difflib
+
+try:
+    from rapidfuzz import fuzz, process as rf_process
+    RAPIDFUZZ_AVAILABLE = True
+except ImportError:
+    fuzz = None
+    rf_process = None
+    RAPIDFUZZ_AVAILABLE = False
+
+# 尝试导入pyahocorasick：可用时命令子串匹配用自动机单遍扫描完成
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    ahocorasick = None
+    AHOCORASICK_AVAILABLE = False
+
+# 尝试导入webrtcvad：可用时用其C实现的语音判定替代纯能量阈值
+
+try:
+    import webrtcvad
+    WEBRTC_VAD_AVAILABLE = True
+except ImportError:
+    webrtcvad = None
+    WEBRTC_VAD_AVAILABLE = False
+
+# 尝试导入numba：rapidfuzz缺失时用JIT编译的Levenshtein替代纯Python的SequenceMatcher
+
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    numba = None
+    NUMBA_AVAILABLE = False
+
+if NUMBA_AVAILABLE:
+    @numba.njit(cache=True)
+    def _indel_distance(a, b):
+        """双行DP计算indel编辑距离，输入为码点数组
+
+        替换计为删+插（代价2），与fuzz.ratio的标度一致：
+        ratio = 1 - 距离/(la+lb)，各后端共用同一套阈值。
+        """
+        m = a.shape[0]
+        n = b.shape[0]
+        if m == 0:
+            return n
+        if n == 0:
+            return m
+        prev = np.arange(n + 1)
+        curr = np.empty(n + 1, dtype=np.int64)
+        for i in range(1, m + 1):
+            curr[0] = i
+            for j in range(1, n + 1):
+                cost = 0 if a[i - 1] == b[j - 1] else 2
+                curr[j] = min(prev[j] + 1, curr[j - 1] + 1, prev[j - 1] + cost)
+            prev, curr = curr, prev
+        return prev[n]
+
+    @numba.njit(cache=True, fastmath=True)
+    def _rms_energy(chunk):
+        """单遍SIMD循环计算RMS能量，免去每块音频的NumPy分发开销"""
+        acc = 0.0
+        for i in range(chunk.shape[0]):
+            acc += chunk[i] * chunk[i]
+        return (acc / chunk.shape[0]) ** 0.5
+
+
+def _str_to_codes(s):
+    """把字符串转成uint32码点数组，供JIT编辑距离使用"""
+    return np.frombuffer(s.encode("utf-32-le"), dtype=np.uint32)
+
 # 尝试导入pyperclip，如果失败则使用备用方案
 
 try:
@@ -51,6 +133,103 @@ def safe_findsource(object):
 inspect.findsource = safe_findsource
 from streaming_sensevoice import StreamingSenseVoice
 
+# 音频管线的统一采样参数：采集blocksize与VAD帧长共用同一符号，
+# 避免两处字面量漂移导致PortAudio内部重新分块
+SAMPLE_RATE = 16000
+CHUNK_MS = 100
+SAMPLES_PER_READ = SAMPLE_RATE * CHUNK_MS // 1000
+
+# 识别文本归一化用的空白折叠模式：导入时编译一次，
+# 热路径不再走re模块的每次查缓存/加锁
+_RE_WS = re.compile(r"\s+")
+
+# 启动横幅：一次性拼好，main()里单次write输出，
+# 不为十余行提示各付一次stdout加锁/编码/系统调用
+_BANNER = "\n".join([
+    "🎙️  改进版语音识别应用 - 支持长语音输入",
+    "=" * 50,
+    "✅ 使用改进的VAD算法，更好地处理长语音",
+    "🛡️ 动态噪声基底适应，减少误判",
+    "🎯 灵活的语音边界检测，支持短暂停顿",
+    "⚡ 能量平滑处理，提高识别稳定性",
+    "🔧 优化的参数设置：",
+    "   - 激活阈值: 0.015 (更容易激活)",
+    "   - 静音填充: 800ms (更长的容忍时间)",
+    "   - 最大静音: 1500ms (避免无限等待)",
+    "💡 适合各种语音输入场景，包括长句子和复杂表达",
+]) + "\n"
+
+# 上下文关键词（热词）：提高这些命令词的识别准确率；
+# 常量元组在模块导入时构建一次，main()不再每次重建列表
+CONTEXTS = (
+    "停止", "开始", "退出", "刷新", "复制", "粘贴", "剪切",
+    "撤销", "重做", "保存", "全选", "最小化", "最大化",
+    "关闭", "切换", "打开", "新建", "截图", "静音",
+)
+
+# 由命令/同义词表派生的全部匹配结构，见_build_matcher
+_Matcher = namedtuple(
+    "_Matcher",
+    ["ac", "cmd_re", "syn_re", "by_len", "all_keys",
+     "key_to_canon", "max_key_len", "all_chars"],
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _build_matcher(exact_keys, n_cmds):
+    """
+    按归一化的(键, 规范命令)元组构建匹配结构并缓存
+
+    测试或PyInstaller重入main()会重复实例化CommandProcessor；
+    命令表相同时，自动机/正则交替/长度桶等派生结构只构建一次。
+
+    Args:
+        exact_keys: ((key, canonical), ...)元组，前n_cmds项为命令
+        n_cmds: 命令数量（其余为同义词）
+
+    Returns:
+        _Matcher: 打包好的匹配结构
+    """
+    # 子串匹配的Aho-Corasick自动机：O(|文本|)单遍扫描命中全部键，
+    # 命中值携带原表下标以保持"命令先于同义词"的优先顺序
+    ac = None
+    if AHOCORASICK_AVAILABLE:
+        ac = ahocorasick.Automaton()
+        for priority, (key, canonical) in enumerate(exact_keys):
+            ac.add_word(key, (priority, canonical))
+        ac.make_automaton()
+
+    # 自动机不可用时的回退：命令/同义词各预编译为一条C级正则交替，
+    # 同一位置按长度降序优先命中（"刷新页面"先于"刷新"）
+    cmd_keys = [key for key, _ in exact_keys[:n_cmds]]
+    syn_keys = [key for key, _ in exact_keys[n_cmds:]]
+    cmd_re = re.compile(
+        "|".join(map(re.escape, sorted(cmd_keys, key=len, reverse=True)))
+    )
+    syn_re = re.compile(
+        "|".join(map(re.escape, sorted(syn_keys, key=len, reverse=True)))
+    ) if syn_keys else None
+
+    # 按字符长度建立索引，模糊匹配的回退路径只访问相近长度的桶
+    by_len = defaultdict(list)
+    for key, canonical in exact_keys:
+        by_len[len(key)].append((key, canonical))
+
+    # rapidfuzz批量模糊匹配所需的键列表与反查表，
+    # 以及早退剪枝用的最长键长度/全部出现过的字符
+    all_keys = [key for key, _ in exact_keys]
+    return _Matcher(
+        ac=ac,
+        cmd_re=cmd_re,
+        syn_re=syn_re,
+        by_len=by_len,
+        all_keys=all_keys,
+        key_to_canon=dict(exact_keys),
+        max_key_len=max(len(key) for key, _ in exact_keys),
+        all_chars=frozenset().union(*all_keys),
+    )
+
+
 class CommandProcessor:
     """命令处理器类，用于识别和执行语音命令"""
     
@@ -68,7 +247,7 @@ class CommandProcessor:
         self.last_command = None  # 最后执行的命令
         self.last_command_time = 0  # 最后执行命令的时间
         self.command_cooldown = 2.0  # 命令冷却时间（秒）
-        self.last_recognized_text = ""  # 最后识别的文本
+        self._last_texts = deque(maxlen=4)  # 最近识别文本的环形缓冲，用于跨帧去重
         self.text_repeat_threshold = 0.8  # 文本重复阈值
         
         # 检查keyboard库是否可用
@@ -80,6 +259,20 @@ class CommandProcessor:
         
         # 加载快捷键配置
         self.shortcut_config = ShortcutConfig()
+
+        # 初始化时把快捷键字符串一次性解析成按键元组，
+        # 命令分发热路径只剩一次字典查找
+        self._resolved_keys = {
+            info['command']: tuple(info['keys'].split('+'))
+            for info in self.shortcut_config.shortcuts
+        }
+
+        # 初始化时按优先级解析一次按键发送后端，之后所有命令直接复用
+        self._key_backend = self._select_key_backend()
+
+        # 按键发送的去抖截止时间：只有紧挨着的两次发送才需要等待，
+        # 单次命令不再固定付出100ms延迟
+        self._next_send_ok_at = 0.0
         
         # 定义需要特殊处理的命令
         self.special_commands = {
@@ -94,15 +287,13 @@ class CommandProcessor:
             "打开计算器": self.open_calculator,
         }
         
-        # 从配置动态构建所有可用命令
-        self.commands = {}
-        self.commands.update(self.special_commands)
-        for shortcut_info in self.shortcut_config.shortcuts:
-            command_name = shortcut_info['command']
-            if command_name not in self.commands:
-                # 对于非特殊命令，统一使用快捷键执行器
-                # 使用 lambda cmd=command_name: ... 来正确捕获 command_name
-                self.commands[command_name] = lambda cmd=command_name: self.execute_shortcut(cmd)
+        # 全部可用命令名（特殊命令优先，配置命令去重后追加）：
+        # 分发时直接查special_commands/_resolved_keys两张表，
+        # 不再为每个快捷键命令构造lambda闭包
+        self.commands = dict.fromkeys(itertools.chain(
+            self.special_commands,
+            (info['command'] for info in self.shortcut_config.shortcuts),
+        ))
 
         # 命令同义词映射
         self.synonyms = {
@@ -139,7 +330,95 @@ class CommandProcessor:
             "屏幕截图": "截图",
             "屏幕截屏": "截图",
         }
-    
+
+        # 预解析外部程序的启动方式，避免每次调用重复走注册表/PATH查找
+        try:
+            self._browser = webbrowser.get()
+        except webbrowser.Error:
+            self._browser = None
+        self._notepad_path = shutil.which("notepad.exe") or "notepad.exe"
+        self._calc_path = shutil.which("calc.exe") or "calc.exe"
+
+        # 预先归一化所有命令和同义词，匹配阶段无需反复lower/strip；
+        # 规范名沿同义词链解析到可执行命令（如"刷新网页"→"刷新页面"→
+        # "刷新"），保证任何匹配结构都不会给出不可执行的名字
+        self._exact_keys = tuple(
+            (key.strip().lower(), self._resolve_canonical(canonical))
+            for key, canonical in itertools.chain(
+                ((cmd, cmd) for cmd in self.commands),
+                self.synonyms.items(),
+            )
+        )
+
+        # 派生的匹配结构（自动机/正则/长度桶等）由模块级缓存构建器
+        # 提供：同一命令表在进程内只构建一次，重复实例化直接复用
+        matcher = _build_matcher(self._exact_keys, len(self.commands))
+        self._ac = matcher.ac
+        self._cmd_re = matcher.cmd_re
+        self._syn_re = matcher.syn_re
+        self._by_len = matcher.by_len
+        self._all_keys = matcher.all_keys
+        self._key_to_canon = matcher.key_to_canon
+        self._max_key_len = matcher.max_key_len
+        self._all_chars = matcher.all_chars
+
+        # 匹配结果按归一化文本做LRU缓存：命令表在初始化后不再变化，
+        # 重复短语（口令类场景的常态）直接命中缓存
+        self._find_command_cached = functools.lru_cache(maxsize=512)(
+            self._find_command_impl
+        )
+
+        if not RAPIDFUZZ_AVAILABLE and NUMBA_AVAILABLE:
+            # 触发JIT预编译，避免首条语音命令承担编译延迟
+            _indel_distance(np.zeros(1, dtype=np.uint32), np.zeros(1, dtype=np.uint32))
+
+    def _resolve_canonical(self, name):
+        """
+        沿同义词链解析出可执行的命令名
+
+        同义词的目标可能本身还是同义词键而非命令；逐级跟进直到
+        落在命令表里（带环路保护），避免匹配器返回无法执行的名字。
+        """
+        seen = set()
+        while name not in self.commands and name in self.synonyms:
+            if name in seen:
+                break
+            seen.add(name)
+            name = self.synonyms[name]
+        return name
+
+    def _select_key_backend(self):
+        """
+        按优先级解析可用的按键发送后端（keyboard > pyautogui）
+
+        只在初始化时执行一次，避免每次命令都重复尝试各备用方案。
+
+        Returns:
+            具有send_hotkey/send_key方法的对象，无可用后端时返回None
+        """
+        if self.keyboard_available:
+            return self
+        try:
+            from controller import PyAutoGUIController
+        except ImportError:
+            return None
+        backend = PyAutoGUIController()
+        return backend if backend.is_available() else None
+
+    def copy(self):
+        """发送Ctrl+C执行复制"""
+        if self._key_backend is None:
+            print("❌ 无可用的按键后端，无法执行复制")
+            return False
+        return self._key_backend.send_hotkey('ctrl', 'c')
+
+    def _throttle_send(self):
+        """保证相邻两次按键发送间隔至少50ms，其余情况不额外等待"""
+        wait = self._next_send_ok_at - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self._next_send_ok_at = time.monotonic() + 0.05
+
     def send_hotkey(self, *keys):
         """
         使用keyboard库发送快捷键
@@ -158,8 +437,8 @@ class CommandProcessor:
             # 使用keyboard.send发送组合键
             hotkey_str = '+'.join(keys)
             print(f"🎹 发送快捷键: {hotkey_str}")
+            self._throttle_send()
             keyboard.send(hotkey_str)
-            time.sleep(0.1)  # 小延迟确保按键被正确处理
             return True
         except Exception as e:
             print(f"❌ 发送快捷键失败 ({hotkey_str}): {e}")
@@ -181,8 +460,8 @@ class CommandProcessor:
         
         try:
             print(f"🎹 发送按键: {key}")
+            self._throttle_send()
             keyboard.send(key)
-            time.sleep(0.1)  # 小延迟确保按键被正确处理
             return True
         except Exception as e:
             print(f"❌ 发送按键失败 ({key}): {e}")
@@ -198,18 +477,20 @@ class CommandProcessor:
         Returns:
             bool: 执行是否成功
         """
-        shortcut = self.shortcut_config.get_shortcut(command)
-        if not shortcut:
+        keys = self._resolved_keys.get(command)
+        if not keys:
             print(f"❌ 未找到命令 '{command}' 的快捷键配置")
             return False
-        
-        # 将快捷键字符串分割成按键列表
-        keys = shortcut.split('+')
+
+        if self._key_backend is None:
+            print(f"❌ 无可用的按键后端，无法执行命令 '{command}'")
+            return False
+
         # 区分是组合键还是单个功能键
         if len(keys) > 1:
-            return self.send_hotkey(*keys)
+            return self._key_backend.send_hotkey(*keys)
         else:
-            return self.send_key(keys[0])
+            return self._key_backend.send_key(keys[0])
     
     def print_available_commands(self):
         """打印可用的语音命令和对应的快捷键"""
@@ -218,17 +499,29 @@ class CommandProcessor:
     def open_browser(self):
         """打开默认浏览器"""
         try:
-            webbrowser.open('about:blank')
+            # 使用初始化时解析好的浏览器控制器，省去每次的注册表查找
+            if self._browser is not None:
+                self._browser.open('about:blank')
+            else:
+                webbrowser.open('about:blank')
             print("🌐 已打开浏览器")
             return True
         except Exception as e:
             print(f"❌ 打开浏览器失败: {e}")
             return False
 
+    def _launch(self, path):
+        """启动预解析好的外部程序"""
+        if hasattr(os, "startfile"):
+            # Windows下走ShellExecuteEx，比CreateProcess更轻
+            os.startfile(path)
+        else:
+            subprocess.Popen([path])
+
     def open_notepad(self):
         """打开记事本"""
         try:
-            subprocess.Popen(["notepad.exe"])
+            self._launch(self._notepad_path)
             print("📝 已打开记事本")
             return True
         except Exception as e:
@@ -238,7 +531,7 @@ class CommandProcessor:
     def open_calculator(self):
         """打开计算器"""
         try:
-            subprocess.Popen(["calc.exe"])
+            self._launch(self._calc_path)
             print("🧮 已打开计算器")
             return True
         except Exception as e:
@@ -286,62 +579,92 @@ class CommandProcessor:
         return True
 
     def similarity(self, a, b):
-        """计算两个字符串的相似度"""
+        """计算两个字符串的相似度（0~1）"""
+        if RAPIDFUZZ_AVAILABLE:
+            return fuzz.ratio(a, b) / 100.0
+        if NUMBA_AVAILABLE:
+            if not a or not b:
+                return 1.0 if a == b else 0.0
+            distance = _indel_distance(_str_to_codes(a), _str_to_codes(b))
+            # 与fuzz.ratio同一标度（"截个图"对"截图"为0.8而非0.67），
+            # 各后端共用同一套相似度阈值
+            return 1.0 - distance / (len(a) + len(b))
         return SequenceMatcher(None, a, b).ratio()
 
     def find_command(self, text):
         """
         从识别文本中查找匹配的命令
-        
+
         Args:
             text (str): 识别的文本
-            
+
         Returns:
             str or None: 匹配的命令名称，如果没有找到则返回None
         """
-        text = text.strip().lower()
-        
-        # 使用 self.commands 的键作为完整的命令列表
-        all_commands = list(self.commands.keys())
-        
-        # 1. 精确匹配
-        for cmd in all_commands:
-            if cmd in text:
-                return cmd
-        
-        # 2. 同义词匹配
-        for synonym, cmd in self.synonyms.items():
-            if synonym in text:
-                return cmd
-        
-        # 3. 开头匹配（针对像"刷新新"这样的情况）
-        for cmd in all_commands:
-            if text.startswith(cmd):
-                return cmd
-        
-        # 4. 模糊匹配（相似度阈值设为0.6）
+        # 归一化后走LRU缓存：同一短语反复出现时直接复用上次的匹配结果
+        return self._find_command_cached(_RE_WS.sub(" ", text.strip().lower()))
+
+    def _find_command_impl(self, text):
+        """find_command的实际匹配逻辑，输入须已strip/lower"""
+        # 0. 短语音绝大多数就是2-3字的命令本身：先做O(1)字典查找，
+        # 再试掉一头/一尾字符（容忍单字插入噪声），都命中不了才扫描
+        canonical = self._key_to_canon.get(text)
+        if canonical is not None:
+            return canonical
+        if len(text) > 1:
+            canonical = (self._key_to_canon.get(text[1:])
+                         or self._key_to_canon.get(text[:-1]))
+            if canonical is not None:
+                return canonical
+
+        # 1/2/3. 精确匹配与同义词匹配（使用预归一化的键，命令优先于同义词；
+        # 子串包含同时覆盖了原先单独的开头匹配，如"刷新新"）
+        if self._ac is not None:
+            # 自动机单遍扫描，所有命中里取原表顺序最靠前的
+            best_hit = None
+            for _, (priority, canonical) in self._ac.iter(text):
+                if best_hit is None or priority < best_hit[0]:
+                    best_hit = (priority, canonical)
+            if best_hit is not None:
+                return best_hit[1]
+        else:
+            # 两次C级正则检索替代逐键的Python子串扫描，命令仍优先于同义词
+            m = self._cmd_re.search(text)
+            if m:
+                return self._key_to_canon[m.group(0)]
+            if self._syn_re is not None:
+                m = self._syn_re.search(text)
+                if m:
+                    return self._key_to_canon[m.group(0)]
+
+        # 剪枝：文本远长于任何命令键，或与命令表没有公共字符时，
+        # 模糊匹配不可能达到阈值，直接放弃
+        tlen = len(text)
+        if tlen > 3 * self._max_key_len:
+            return None
+        if not self._all_chars.intersection(text):
+            return None
+
+        # 4/5. 模糊匹配：短文本用更高的阈值——字符基数小时低阈值
+        # 极易把无关短词误配成命令（"刷新新"对"刷新"为80分，仍可通过）
+        score_cutoff = 75 if tlen < 6 else 55
         best_match = None
-        best_score = 0.6
-        
-        for cmd in all_commands:
-            score = self.similarity(text, cmd)
-            if score > best_score:
-                best_score = score
-                best_match = cmd
-        
-        # 5. 检查同义词的模糊匹配
-        for synonym, cmd_target in self.synonyms.items():
-            score = self.similarity(text, synonym)
-            if score > best_score:
-                best_score = score
-                best_match = cmd_target
-        
-        # 6. 容错匹配
-        if not best_match and len(text) > 2:
-            truncated_text = text[:-1]
-            for cmd in all_commands:
-                if cmd == truncated_text or cmd in truncated_text:
-                    return cmd
+        if RAPIDFUZZ_AVAILABLE:
+            # C++实现的批量top-1检索，循环在扩展内部完成
+            hit = rf_process.extractOne(
+                text, self._all_keys, scorer=fuzz.ratio, score_cutoff=score_cutoff
+            )
+            if hit:
+                best_match = self._key_to_canon[hit[0]]
+        else:
+            # 回退路径：只访问与文本长度相近（±2）的桶，避免扫描整个命令表
+            best_score = score_cutoff / 100.0
+            for length in range(max(1, tlen - 2), tlen + 3):
+                for key, canonical in self._by_len.get(length, ()):
+                    score = self.similarity(text, key)
+                    if score > best_score:
+                        best_score = score
+                        best_match = canonical
         
         return best_match
 
@@ -355,18 +678,21 @@ class CommandProcessor:
         Returns:
             bool: 执行是否成功
         """
-        if command_name in self.commands:
-            try:
-                print(f"🔧 执行命令: {command_name}")
-                # 调用在 __init__ 中映射好的方法
-                result = self.commands[command_name]()
-                return result if result is not None else True
-            except Exception as e:
-                print(f"❌ 命令执行失败: {e}")
-                return False
-        else:
+        # 先查特殊命令表，再查预解析的快捷键表，无需经过lambda中转
+        handler = self.special_commands.get(command_name)
+        if handler is None and command_name not in self._resolved_keys:
             print(f"❌ 未知命令: {command_name}")
             return False
+        try:
+            print(f"🔧 执行命令: {command_name}")
+            if handler is not None:
+                result = handler()
+            else:
+                result = self.execute_shortcut(command_name)
+            return result if result is not None else True
+        except Exception as e:
+            print(f"❌ 命令执行失败: {e}")
+            return False
 
     def process_text(self, text):
         """
@@ -378,10 +704,17 @@ class CommandProcessor:
         Returns:
             bool: 是否找到并执行了命令
         """
-        if self.is_text_repeated(text):
+        # 入口处归一化一次（小写并折叠空白），重复检测/命令查找/
+        # 去重记录以及LRU缓存键共用同一份字符串
+        norm = _RE_WS.sub(" ", text.strip().lower())
+        # 完全相同的重复（循环VAD的常态）直接字符串比较即可拦下，
+        # 不必进入模糊去重和命令匹配
+        if self._last_texts and norm == self._last_texts[-1]:
             return False
-        
-        command = self.find_command(text)
+        if self.is_text_repeated(norm):
+            return False
+
+        command = self._find_command_cached(norm)
         if command:
             if self.is_command_in_cooldown(command):
                 print(f"⏰ 命令 '{command}' 正在冷却中，请稍后再试")
@@ -393,17 +726,31 @@ class CommandProcessor:
             if result:
                 self.last_command = command
                 self.last_command_time = time.time()
-                self.last_recognized_text = text
+                self._last_texts.append(norm)
             
             return result
         return False
 
     def is_text_repeated(self, text):
-        """检查文本是否与最近识别的文本重复"""
-        if not self.last_recognized_text:
+        """检查文本是否与最近几次识别的文本重复（输入须已strip/lower）"""
+        if not self._last_texts:
             return False
-        similarity = self.similarity(text.lower().strip(), self.last_recognized_text.lower().strip())
-        return similarity > self.text_repeat_threshold
+        tlen = len(text)
+        if tlen == 0:
+            return False
+        for prev in self._last_texts:
+            # 相似度上界为2*min/(la+lb)：长度差过大时不可能达标，
+            # 直接跳过二次方的比对
+            plen = len(prev)
+            if 2 * min(tlen, plen) < self.text_repeat_threshold * (tlen + plen):
+                continue
+            if RAPIDFUZZ_AVAILABLE:
+                # rapidfuzz为C实现，逐项比较最近N条文本的开销可以忽略
+                if fuzz.ratio(text, prev) >= self.text_repeat_threshold * 100:
+                    return True
+            elif self.similarity(text, prev) > self.text_repeat_threshold:
+                return True
+        return False
 
     def is_command_in_cooldown(self, command):
         """检查命令是否在冷却期内"""
@@ -416,15 +763,21 @@ class CommandProcessor:
         """重置命令执行状态"""
         self.last_command = None
         self.last_command_time = 0
-        self.last_recognized_text = ""
+        self._last_texts.clear()
 
     # ===== 应用控制命令 =====
     def exit_app(self):
         """退出应用"""
         print("👋 正在退出应用...")
         if self.app:
+            # 语音"退出"是用户的主动意图，先打标记，
+            # run()收尾时才不会按"程序意外结束"处理
+            self.app.user_exit_requested = True
             self.app.stop_recognition()
-        os._exit(0)
+            self.app.release_model()
+        # 本方法运行在文本工作线程里：SystemExit只结束该线程；
+        # 进程退出靠stop_recognition置位停止事件唤醒run()完成收尾
+        sys.exit(0)
     
     def stop_recognition(self):
         """停止语音识别"""
@@ -434,6 +787,13 @@ class CommandProcessor:
         return True
 
 
+class VADEvent(IntEnum):
+    """ImprovedVAD单次调用的事件类型"""
+    NONE = 0   # 无状态变化
+    START = 1  # 检测到语音开始
+    END = 2    # 语音段结束，携带完整语音数据
+
+
 class ImprovedVAD:
     """改进的音量检测VAD，更好地支持长语音输入"""
     
@@ -442,68 +802,129 @@ class ImprovedVAD:
                  speech_pad_ms=800,  # 增加静音填充时间
                  min_speech_ms=200,  # 降低最小语音长度要求
                  max_silence_ms=1500,  # 最大静音时长，避免过早结束
-                 energy_smooth_window=5):  # 能量平滑窗口
-        
+                 energy_smooth_window=5,  # 能量平滑窗口
+                 use_webrtc=True):  # 可用时优先使用WebRTC VAD判定语音
+
         self.threshold = threshold
-        self.speech_pad_samples = int(speech_pad_ms * 16000 / 1000)
-        self.min_speech_samples = int(min_speech_ms * 16000 / 1000)
-        self.max_silence_samples = int(max_silence_ms * 16000 / 1000)
+        self.speech_pad_samples = speech_pad_ms * SAMPLE_RATE // 1000
+        self.min_speech_samples = min_speech_ms * SAMPLE_RATE // 1000
+        self.max_silence_samples = max_silence_ms * SAMPLE_RATE // 1000
+        # 单段语音硬上限：超过即强制切分，限定最坏情况的ASR延迟
+        self.max_speech_samples = 20 * SAMPLE_RATE
+        # 结束切片时保留的静音余量（150ms），多余的静音尾巴不交给ASR
+        self.hangover_samples = 150 * SAMPLE_RATE // 1000
         
         self.is_speech = False
-        self.speech_buffer = []
+        # 预分配的语音缓冲区（30秒上限），用写游标追加，结束时切片取出，
+        # 避免Python列表逐样本装箱和整段拷贝
+        self._buf = np.empty(30 * SAMPLE_RATE, dtype=np.float32)
+        self._buf_len = 0
+        # 预滚动缓冲：保留语音触发前最近约300ms的音频，起点检测的迟滞
+        # 不会再截掉第一个音节
+        self.pre_roll = deque(maxlen=3)
         self.silence_counter = 0
         self.speech_counter = 0  # 语音持续计数器
         self.speech_start_time = 0
         
-        # 能量历史和平滑
-        self.energy_history = []
+        # 能量历史和平滑：定长float32环形缓冲，插入O(1)，无列表搬移
         self.energy_history_length = 20
+        self.energy_history = np.zeros(self.energy_history_length, dtype=np.float32)
+        self._eh_idx = 0
+        self._eh_filled = 0
         self.energy_smooth_window = energy_smooth_window
-        
+        # 平滑窗口的增量和：插入新能量时加新减旧，O(1)出均值，无逐帧归约
+        self._smooth_sum = 0.0
+
         # 动态阈值调整
         self.noise_floor = 0.01  # 噪声基底
         self.dynamic_threshold_factor = 1.5  # 动态阈值系数
+        # 噪声基底每隔几个块才重算一次，期间直接使用缓存的动态阈值
+        self.dynamic_threshold = max(
+            self.threshold, self.noise_floor * self.dynamic_threshold_factor
+        )
+        self._noise_update_interval = 5
+        self._noise_update_counter = 0
         
         # 语音活动历史
         self.activity_history = []
         self.activity_window = 10
-        
+
+        # WebRTC VAD（可选）：C实现的按帧语音判定，抗噪性优于能量阈值；
+        # 不可用时回退到能量判定，起止/静音状态机两种后端共用
+        self._webrtc = None
+        if use_webrtc and WEBRTC_VAD_AVAILABLE:
+            self._webrtc = webrtcvad.Vad(2)
+            print("✅ 使用WebRTC VAD进行语音判定")
+        
+    def _append_to_buffer(self, audio_chunk):
+        """把音频块批量写入预分配缓冲区（超出上限的部分丢弃）"""
+        n = min(len(audio_chunk), self._buf.size - self._buf_len)
+        if n > 0:
+            self._buf[self._buf_len:self._buf_len + n] = audio_chunk[:n]
+            self._buf_len += n
+
     def _calculate_energy(self, audio_chunk):
-        """计算音频能量，使用RMS方法"""
-        return np.sqrt(np.mean(audio_chunk ** 2))
+        """计算音频能量，使用RMS方法（单次归约，不生成平方临时数组）
+
+        numba可用时走JIT内核（首次调用由模型预热触发编译），
+        否则用np.dot归约。
+        """
+        if NUMBA_AVAILABLE:
+            return float(_rms_energy(audio_chunk))
+        return float(np.sqrt(np.dot(audio_chunk, audio_chunk) / audio_chunk.size))
     
+    def _recent_energies(self, n):
+        """从环形缓冲中取最近n个能量值"""
+        n = min(n, self._eh_filled)
+        indices = np.arange(self._eh_idx - n, self._eh_idx)
+        return self.energy_history.take(indices, mode="wrap")
+
     def _smooth_energy(self, energy):
-        """对能量进行平滑处理"""
-        self.energy_history.append(energy)
-        if len(self.energy_history) > self.energy_history_length:
-            self.energy_history.pop(0)
-        
+        """对能量进行平滑处理（增量维护窗口和，每帧O(1)，不做归约）"""
+        # 先舍入到float32再累加，保证入窗值与日后出窗值完全一致，
+        # 增量和长时间运行不产生漂移
+        energy = float(np.float32(energy))
+        window = self.energy_smooth_window
+        if self._eh_filled >= window:
+            # 新值入窗的同时，窗口最老的值（w帧之前）出窗
+            evicted_idx = (self._eh_idx - window) % self.energy_history_length
+            self._smooth_sum += energy - float(self.energy_history[evicted_idx])
+        else:
+            self._smooth_sum += energy
+
+        self.energy_history[self._eh_idx] = energy
+        self._eh_idx = (self._eh_idx + 1) % self.energy_history_length
+        self._eh_filled = min(self._eh_filled + 1, self.energy_history_length)
+
         # 计算移动平均
-        if len(self.energy_history) >= self.energy_smooth_window:
-            window = self.energy_history[-self.energy_smooth_window:]
-            return np.mean(window)
+        if self._eh_filled >= window:
+            return self._smooth_sum / window
         return energy
-    
+
     def _update_noise_floor(self, energy):
-        """更新噪声基底估计"""
-        if not self.is_speech and len(self.energy_history) > 5:
-            # 在非语音期间更新噪声基底
-            recent_energies = self.energy_history[-10:]
-            self.noise_floor = np.percentile(recent_energies, 30)
-    
+        """更新噪声基底估计（按间隔重算，摊薄滑动窗口归约成本）"""
+        if self.is_speech or self._eh_filled <= 5:
+            return
+        # 在非语音期间更新噪声基底
+        self._noise_update_counter += 1
+        if self._noise_update_counter < self._noise_update_interval:
+            return
+        self._noise_update_counter = 0
+        recent_energies = self._recent_energies(10)
+        self.noise_floor = float(np.percentile(recent_energies, 30))
+        # 噪声基底变化时同步刷新缓存的动态阈值
+        self.dynamic_threshold = max(
+            self.threshold,
+            self.noise_floor * self.dynamic_threshold_factor
+        )
+
     def _is_speech_energy(self, energy, smoothed_energy):
         """判断当前能量是否为语音"""
         # 更新噪声基底
         self._update_noise_floor(energy)
-        
-        # 计算动态阈值
-        dynamic_threshold = max(
-            self.threshold,
-            self.noise_floor * self.dynamic_threshold_factor
-        )
-        
-        # 使用平滑后的能量进行判断
-        is_voice = smoothed_energy > dynamic_threshold
+
+        # 使用平滑后的能量和缓存的动态阈值进行判断
+        is_voice = smoothed_energy > self.dynamic_threshold
         
         # 更新活动历史
         self.activity_history.append(1 if is_voice else 0)
@@ -517,71 +938,123 @@ class ImprovedVAD:
                 return True
         
         return is_voice
-    
+
+    def _is_speech_webrtc(self, audio_chunk):
+        """用WebRTC VAD按30ms帧投票判定语音（过半帧为语音则整块算语音）"""
+        frame_len = 480  # 30ms @ 16kHz
+        pcm = (np.clip(audio_chunk, -1.0, 1.0) * 32767).astype(np.int16)
+        total = 0
+        speech_frames = 0
+        for start in range(0, len(pcm) - frame_len + 1, frame_len):
+            total += 1
+            if self._webrtc.is_speech(pcm[start:start + frame_len].tobytes(), SAMPLE_RATE):
+                speech_frames += 1
+        if total == 0:
+            return False
+        return speech_frames * 2 >= total
+
     def __call__(self, audio_chunk):
-        """处理音频块并返回语音段"""
+        """
+        处理音频块并返回 (事件, 语音数据)
+
+        audio_chunk须为连续的float32数组（调用方在管线边界已统一转换），
+        以保证numpy归约走SIMD路径、缓冲写入为纯memcpy。
+        常见的"持续静音"路径直接返回 (VADEvent.NONE, None)，不创建
+        生成器帧，也不分配空数组。
+
+        Returns:
+            tuple: (VADEvent, np.ndarray or None)，仅END事件携带语音数据
+        """
         # 计算音频能量
         energy = self._calculate_energy(audio_chunk)
         smoothed_energy = self._smooth_energy(energy)
-        
-        is_voice = self._is_speech_energy(energy, smoothed_energy)
-        
+
+        if self._webrtc is not None:
+            is_voice = self._is_speech_webrtc(audio_chunk)
+        else:
+            is_voice = self._is_speech_energy(energy, smoothed_energy)
+
         if is_voice:
             self.speech_counter += len(audio_chunk)
-            
+
             if not self.is_speech:
                 # 语音开始
                 self.is_speech = True
-                self.speech_buffer = []
+                self._buf_len = 0
                 self.silence_counter = 0
                 self.speech_counter = len(audio_chunk)
                 self.speech_start_time = time.time()
                 print(f"🎤 语音开始 (能量: {energy:.4f}, 平滑能量: {smoothed_energy:.4f}, 阈值: {self.threshold:.4f})")
-                yield {"start": True}, np.array([])
-            
+                # 先回灌预滚动缓冲，再写入触发块
+                for pre_chunk in self.pre_roll:
+                    self._append_to_buffer(pre_chunk)
+                self.pre_roll.clear()
+                self._append_to_buffer(audio_chunk)
+                return VADEvent.START, None
+
             # 添加到语音缓冲区
-            self.speech_buffer.extend(audio_chunk)
+            self._append_to_buffer(audio_chunk)
             self.silence_counter = 0  # 重置静音计数器
-            
+
+            # 不停顿的超长语音也要强制切分，否则整条流水线被一段语音阻塞
+            if self._buf_len >= self.max_speech_samples:
+                self.is_speech = False
+                speech_data = self._buf[:self._buf_len].copy()
+                print(f"⚠️ 达到最大语音长度 ({self.max_speech_samples / SAMPLE_RATE:.0f}s)，强制切分")
+                self._buf_len = 0
+                self.speech_counter = 0
+                self.activity_history = []
+                return VADEvent.END, speech_data
+
         else:  # 静音
             if self.is_speech:
                 self.silence_counter += len(audio_chunk)
-                self.speech_buffer.extend(audio_chunk)  # 包含静音部分
-                
+                # 静音尾巴最多缓冲pad长度：更长的静音既不影响结束判定，
+                # 也只会拖慢后续的ASR推理
+                if self.silence_counter <= self.speech_pad_samples:
+                    self._append_to_buffer(audio_chunk)
+
                 # 计算语音持续时间
-                speech_duration_ms = len(self.speech_buffer) / 16000.0 * 1000
-                silence_duration_ms = self.silence_counter / 16000.0 * 1000
+                speech_duration_ms = self._buf_len / SAMPLE_RATE * 1000
+                silence_duration_ms = self.silence_counter / SAMPLE_RATE * 1000
                 
                 # 判断是否应该结束语音
                 # 条件1：静音时间超过阈值且语音时间足够长
                 # 条件2：静音时间超过最大静音时长（避免永远不结束）
                 should_end = False
                 
-                if speech_duration_ms >= self.min_speech_samples / 16000.0 * 1000:
-                    if silence_duration_ms >= self.speech_pad_samples / 16000.0 * 1000:
+                if speech_duration_ms >= self.min_speech_samples / SAMPLE_RATE * 1000:
+                    if silence_duration_ms >= self.speech_pad_samples / SAMPLE_RATE * 1000:
                         should_end = True
                         end_reason = "正常结束"
-                    elif silence_duration_ms >= self.max_silence_samples / 16000.0 * 1000:
+                    elif silence_duration_ms >= self.max_silence_samples / SAMPLE_RATE * 1000:
                         should_end = True
                         end_reason = "最大静音时长"
                 
                 if should_end:
-                    # 语音结束
+                    # 语音结束：裁掉已缓冲的静音尾巴，仅保留固定余量
                     self.is_speech = False
-                    speech_data = np.array(self.speech_buffer)
-                    
+                    buffered_silence = min(self.silence_counter, self.speech_pad_samples)
+                    keep = self._buf_len - buffered_silence + self.hangover_samples
+                    keep = min(self._buf_len, max(keep, 0))
+                    speech_data = self._buf[:keep].copy()
+
                     print(f"🎤 语音结束 - {end_reason} (时长: {speech_duration_ms:.1f}ms, 静音: {silence_duration_ms:.1f}ms)")
-                    
+
                     # 清理状态
-                    self.speech_buffer = []
+                    self._buf_len = 0
                     self.silence_counter = 0
                     self.speech_counter = 0
                     self.activity_history = []  # 清空活动历史
-                    
-                    yield {"end": True}, speech_data
-                    
+
                     # 短暂延迟，避免立即重新触发
                     time.sleep(0.1)
+                    return VADEvent.END, speech_data
+            else:
+                # 非语音期间滚动保存最近的块，供语音起点回灌
+                self.pre_roll.append(audio_chunk)
+
+        return VADEvent.NONE, None
 
 
 class VoiceRecognitionApp:
@@ -604,7 +1077,11 @@ class VoiceRecognitionApp:
         self.vad = None
         self.is_running = False
         self.selected_device_id = None
-        self.recognition_thread = None
+        self._pipeline_threads = []
+        self._capture_q = None
+        self._asr_q = None
+        # 主线程停靠在该事件上，停止识别时唤醒，避免100ms轮询
+        self._stop_event = threading.Event()
         
         # 聊天接口附加参数
         # 用户ID：优先使用传入值，否则从文件读取或生成并持久化
@@ -614,9 +1091,8 @@ class VoiceRecognitionApp:
         self.device = device  # 可选: "keyboard" 或 "mouse"
         self.profile_index = profile_index  # 可选: int
         
-        # 识别结果去重
-        self.last_recognition_result = ""
-        self.last_recognition_timestamps = None
+        # 识别结果去重：只保留上一条结果的紧凑指纹
+        self._last_result_key = None
         
         # 命令识别功能
         self.enable_commands = enable_commands
@@ -627,16 +1103,27 @@ class VoiceRecognitionApp:
             self.command_processor = None
             print("⚠️  命令识别功能已禁用")
         
+        # 最终识别文本经由队列交给后台线程处理，避免阻塞音频管线；
+        # 线程每次唤醒会合并积压的文本，只处理最新一条
+        self._text_queue = queue.Queue()
+        self._text_worker = threading.Thread(
+            target=self._process_text_worker, daemon=True
+        )
+        self._text_worker.start()
+
         # 用于区分是否为用户真实的退出意图
         self.user_exit_requested = False
         self.keyboard_interrupt_count = 0
+        self._last_interrupt_time = 0.0
         
     def get_microphone_devices(self):
         """获取可用的麦克风设备列表"""
         try:
             devices = sd.query_devices()
+            # hostapi表只查询一次，循环内按下标索引，避免逐设备重新枚举
+            hostapis = sd.query_hostapis()
             microphones = []
-            
+
             for idx, device in enumerate(devices):
                 if device['max_input_channels'] > 0:
                     microphones.append({
@@ -644,7 +1131,7 @@ class VoiceRecognitionApp:
                         'name': device['name'],
                         'channels': device['max_input_channels'],
                         'sample_rate': device['default_samplerate'],
-                        'hostapi': sd.query_hostapis(device['hostapi'])['name']
+                        'hostapi': hostapis[device['hostapi']]['name']
                     })
             
             return microphones
@@ -716,7 +1203,14 @@ class VoiceRecognitionApp:
                 max_silence_ms=1500,  # 最大静音时长
                 energy_smooth_window=5  # 能量平滑
             )
-            
+
+            # 预热：用一秒静音跑一次完整推理，把CUDA上下文、线程池、
+            # 首次调用的惰性初始化等一次性开销挪到用户开口之前
+            dummy = np.zeros(SAMPLE_RATE, dtype=np.float32)
+            list(self.model.streaming_inference(dummy, is_last=True))
+            self.model.reset()
+            self.vad(np.zeros(SAMPLES_PER_READ, dtype=np.float32))
+
             print("✅ 模型初始化完成")
             return True
         except Exception as e:
@@ -749,17 +1243,25 @@ class VoiceRecognitionApp:
         print("💡 提示: 支持模糊匹配和同义词识别")
         print("-" * 60)
     
-    def process_audio_stream(self):
-        """处理音频流的线程函数"""
-        samples_per_read = int(0.1 * 16000)  # 每次读取0.1秒的音频
-        
+    def _audio_callback(self, indata, frames, time_info, status):
+        """PortAudio线程回调：只拷贝数据并入队，不做任何其他工作"""
+        try:
+            self._capture_q.put_nowait(indata[:, 0].copy())
+        except queue.Full:
+            # VAD阶段停滞时丢弃当前块；回调线程上不做打印等I/O
+            pass
+
+    def _capture_worker(self):
+        """采集线程：以回调模式持有音频流，缓冲就绪即由PortAudio推送入队"""
         try:
             with sd.InputStream(
                 device=self.selected_device_id,
-                channels=1, 
-                dtype="float32", 
-                samplerate=16000
-            ) as stream:
+                channels=1,
+                dtype="float32",
+                samplerate=SAMPLE_RATE,
+                blocksize=SAMPLES_PER_READ,
+                callback=self._audio_callback
+            ):
                 print("🎧 开始监听音频...")
                 print("💡 改进的VAD设置：")
                 print("   - 更低的激活阈值 (0.015)")
@@ -767,65 +1269,95 @@ class VoiceRecognitionApp:
                 print("   - 最大静音时长限制 (1500ms)")
                 print("   - 能量平滑处理，减少误判")
                 print("   - 动态噪声基底调整")
-                
+
+                # 回调由PortAudio自己的线程驱动，这里只需保持流打开
                 while self.is_running:
-                    try:
-                        samples, _ = stream.read(samples_per_read)
-                        
-                        # 使用改进的VAD处理音频
-                        for speech_dict, speech_samples in self.vad(samples[:, 0]):
-                            if "start" in speech_dict:
-                                self.model.reset()
-                                # 重置命令处理器状态
-                                if self.enable_commands and self.command_processor:
-                                    self.command_processor.reset_command_state()
-                                # 重置识别结果去重状态
-                                self.last_recognition_result = ""
-                                self.last_recognition_timestamps = None
-                            
-                            # 只处理完整的语音段（语音结束时）
-                            if "end" in speech_dict and len(speech_samples) > 0:
-                                try:
-                                    print("🔄 正在处理语音...")
-                                    # 进行语音识别
-                                    recognition_results = []
-                                    for res in self.model.streaming_inference(speech_samples * 32768, is_last=True):
-                                        if res["text"].strip():
-                                            recognition_results.append(res)
-                                    
-                                    # 处理识别结果
-                                    if recognition_results:
-                                        final_result = recognition_results[-1]
-                                        print(f"🗣️  识别结果: {final_result['text']}")
-                                        print(f"⏱️  时间戳: {final_result['timestamps']}")
-                                        
-                                        # 处理最终识别结果
-                                        self.on_recognition_result(final_result, is_final=True)
-                                    else:
-                                        print("⚠️ 未识别到有效内容")
-                                except Exception as e:
-                                    print(f"⚠️ 识别过程中出现错误: {e}")
-                                
-                    except Exception as e:
-                        if self.is_running:
-                            print(f"❌ 音频处理错误: {e}")
-                        
+                    time.sleep(0.2)
+
         except Exception as e:
             print(f"❌ 音频流错误: {e}")
+
+    def _vad_worker(self):
+        """VAD线程：消费采集队列，切分语音段并交给ASR队列"""
+        while self.is_running:
+            try:
+                chunk = self._capture_q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            try:
+                # 管线边界统一成连续的float32：采集配置变动（如int16采样）
+                # 时也不会在VAD内部触发隐式类型提升拷贝
+                chunk = np.ascontiguousarray(chunk, dtype=np.float32)
+                event, speech_samples = self.vad(chunk)
+                if event == VADEvent.START:
+                    # 重置命令处理器状态
+                    if self.enable_commands and self.command_processor:
+                        self.command_processor.reset_command_state()
+                    # 重置识别结果去重状态
+                    self._last_result_key = None
+
+                # 只处理完整的语音段（语音结束时）
+                elif event == VADEvent.END and len(speech_samples) > 0:
+                    try:
+                        self._asr_q.put(speech_samples, timeout=1.0)
+                    except queue.Full:
+                        print("⚠️ ASR处理积压，丢弃一段语音")
+            except Exception as e:
+                if self.is_running:
+                    print(f"❌ VAD处理错误: {e}")
+
+    def _asr_worker(self):
+        """ASR线程：消费完整语音段，串行执行识别"""
+        while self.is_running:
+            try:
+                speech_samples = self._asr_q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            try:
+                print("🔄 正在处理语音...")
+                # 每段语音独立识别；reset放在识别线程内，避免与上一段的推理竞争
+                self.model.reset()
+                # 就地放大到int16量级：speech_samples是VAD切出的独立副本，
+                # 不必为缩放再分配一份整段音频
+                np.multiply(speech_samples, 32768.0, out=speech_samples)
+                # 只保留最后一个非空结果，中间yield不积攒在列表里
+                final_result = None
+                for res in self.model.streaming_inference(speech_samples, is_last=True):
+                    if res["text"].strip():
+                        final_result = res
+
+                # 处理识别结果
+                if final_result is not None:
+                    print(f"🗣️  识别结果: {final_result['text']}")
+                    print(f"⏱️  时间戳: {final_result['timestamps']}")
+
+                    # 处理最终识别结果
+                    self.on_recognition_result(final_result, is_final=True)
+                else:
+                    print("⚠️ 未识别到有效内容")
+            except Exception as e:
+                print(f"⚠️ 识别过程中出现错误: {e}")
     
     def is_duplicate_result(self, result):
         """检查识别结果是否重复"""
         text = result.get("text", "").strip()
+        last = self._last_result_key
+
+        # 先比文本：文本不同必非重复；相同时再用(条数, 首尾时间戳)的
+        # O(1)指纹确认，无论语音多长都不逐项对比时间戳列表
         timestamps = result.get("timestamps", None)
-        
-        # 如果文本和时间戳都相同，则认为是重复结果
-        if (text == self.last_recognition_result and 
-            timestamps == self.last_recognition_timestamps):
+        if timestamps:
+            tail = (len(timestamps), timestamps[0], timestamps[-1])
+        else:
+            tail = (0, None, None)
+
+        if last is not None and text == last[0] and tail == last[1]:
             return True
-        
-        # 更新最后的识别结果
-        self.last_recognition_result = text
-        self.last_recognition_timestamps = timestamps
+
+        # 更新最后的识别结果指纹
+        self._last_result_key = (text, tail)
         return False
     
     def on_recognition_result(self, result, is_final=False):
@@ -840,16 +1372,29 @@ class VoiceRecognitionApp:
             print("🔄 跳过重复识别结果")
             return
         
-        # 只在最终结果时处理命令识别
-        if is_final and self.enable_commands and self.command_processor:
-            # 尝试处理为命令
+        # 最终结果交给后台线程处理，识别管线立即返回
+        if is_final:
+            self._text_queue.put(text)
+
+    def _process_text_worker(self):
+        """后台线程：合并积压的识别文本并逐条处理"""
+        while True:
+            text = self._text_queue.get()
+            # 合并排队期间到达的文本，只保留最新的一条
+            try:
+                while True:
+                    text = self._text_queue.get_nowait()
+            except queue.Empty:
+                pass
+            self._handle_final_text(text)
+
+    def _handle_final_text(self, text):
+        """处理一条最终识别文本：优先命令识别，其次发送到聊天接口"""
+        if self.enable_commands and self.command_processor:
             if self.command_processor.process_text(text):
                 print("🎯 识别到命令，已执行")
                 return  # 如果识别到命令并执行，则不进行其他处理
-        
-        # 如果不是命令，发送到聊天接口
-        if is_final:
-            self.send_to_chat(text)
+        self.send_to_chat(text)
     
     def send_to_chat(self, text):
         """
@@ -984,22 +1529,45 @@ class VoiceRecognitionApp:
             return False
         
         self.is_running = True
-        self.recognition_thread = threading.Thread(target=self.process_audio_stream)
-        self.recognition_thread.daemon = True
-        self.recognition_thread.start()
-        
+        self._stop_event.clear()
+        # 三级流水线：采集 -> VAD切分 -> ASR识别，通过有界队列衔接，
+        # 推理耗时不再阻塞采集
+        self._capture_q = queue.Queue(maxsize=16)
+        self._asr_q = queue.Queue(maxsize=4)
+        self._pipeline_threads = []
+        for target in (self._capture_worker, self._vad_worker, self._asr_worker):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._pipeline_threads.append(thread)
+
         print("🎤 语音识别已启动，请开始说话...")
         print("💡 现在支持更长的语音输入，不会过早中断")
         print("按 Ctrl+C 停止识别")
         
         return True
     
+    def release_model(self):
+        """显式释放ASR模型占用的内存和显存"""
+        if self.model is None:
+            return
+        self.model = None
+        gc.collect()
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except ImportError:
+            pass
+        print("🧹 ASR模型资源已释放")
+
     def stop_recognition(self):
         """停止语音识别"""
         if self.is_running:
             self.is_running = False
-            if self.recognition_thread:
-                self.recognition_thread.join(timeout=2)
+            self._stop_event.set()
+            for thread in self._pipeline_threads:
+                thread.join(timeout=2)
+            self._pipeline_threads = []
             print("🛑 语音识别已停止")
         else:
             print("⚠️  服务未在运行")
@@ -1034,54 +1602,64 @@ class VoiceRecognitionApp:
             
         return True
     
+    def _on_sigint(self, signum, frame):
+        """SIGINT处理器：保持"2秒内按两次Ctrl+C才退出"的语义
+
+        显式处理器不经过KeyboardInterrupt的异常解栈，Ctrl+C不会再
+        落在音频回调或识别代码中间破坏状态。
+        """
+        now = time.time()
+        # 距上次中断超过2秒视为新的一轮确认
+        if now - self._last_interrupt_time > 2.0:
+            self.keyboard_interrupt_count = 0
+        self.keyboard_interrupt_count += 1
+        self._last_interrupt_time = now
+
+        if self.keyboard_interrupt_count == 1:
+            # 首次按下只给一行提示（处理器在主线程的字节码间隙执行，
+            # 打印安全；主线程此刻停靠在wait上，提示无法推迟）
+            print("\n💡 如果要退出程序，请在2秒内再次按 Ctrl+C")
+        else:
+            if self.user_exit_requested:
+                # 退出已确认但清理迟迟未完成（如PortAudio关闭挂起），
+                # 再按一次Ctrl+C直接强杀进程，不再等待线程join
+                os._exit(130)
+            # 确认退出：处理器内只置标志并唤醒主线程，
+            # 停止线程/打印等较重的清理都在wait返回后进行
+            self.user_exit_requested = True
+            self._stop_event.set()
+
     def run(self, device_id=None):
         """运行应用主循环"""
-        last_interrupt_time = 0
-        
         try:
             # 启动服务
             if not self.start_service(device_id):
                 sys.exit(1)
-            
+
             # 开始识别
             if not self.start_recognition():
                 sys.exit(1)
-            
-            print("💡 按两次 Ctrl+C 或在1秒内按一次 Ctrl+C 来真正退出程序")
-            
-            # 保持运行
-            while self.is_running:
-                time.sleep(0.1)
-                
+
+            print("💡 按两次 Ctrl+C 来真正退出程序")
+
+            # 注册显式SIGINT处理器（仅主线程可注册），确认窗口的
+            # 计数逻辑都在处理器内，无需后台重置线程
+            if threading.current_thread() is threading.main_thread():
+                signal.signal(signal.SIGINT, self._on_sigint)
+
+            # 保持运行：停靠在事件上直到stop_recognition唤醒，零空转
+            self._stop_event.wait()
+
+            # SIGINT处理器只置标志；确认退出的反馈在这里统一输出
+            if self.user_exit_requested:
+                print("\n👋 正在退出... (用户确认退出)")
+
         except KeyboardInterrupt:
-            current_time = time.time()
-            self.keyboard_interrupt_count += 1
-            
-            # 如果是第一次KeyboardInterrupt，或者距离上次中断时间超过2秒
-            if self.keyboard_interrupt_count == 1 or (current_time - last_interrupt_time) > 2.0:
-                print(f"\n⚠️ 捕获到KeyboardInterrupt (第{self.keyboard_interrupt_count}次)")
-                print("💡 这可能是程序内部触发的，不是用户退出意图")
-                print("💡 如果要退出程序，请在2秒内再次按 Ctrl+C")
-                last_interrupt_time = current_time
-                
-                # 重置计数器（在2秒后）
-                def reset_counter():
-                    time.sleep(2.1)
-                    if time.time() - last_interrupt_time > 2.0:
-                        self.keyboard_interrupt_count = 0
-                
-                import threading
-                threading.Thread(target=reset_counter, daemon=True).start()
-                
-                # 继续运行
-                self.run_continue_after_interrupt()
-                
-            else:
-                # 短时间内收到第二次KeyboardInterrupt，真正退出
-                print(f"\n\n👋 正在退出... (用户确认退出，第{self.keyboard_interrupt_count}次KeyboardInterrupt)")
-                self.user_exit_requested = True
-                self.stop_recognition()
-                
+            # 处理器未注册时（如非主线程运行）的兜底：直接视为退出
+            print("\n\n👋 正在退出...")
+            self.user_exit_requested = True
+            self.stop_recognition()
+
         except Exception as e:
             print(f"❌ 应用运行错误: {e}")
             print(f"异常类型: {type(e).__name__}")
@@ -1091,45 +1669,16 @@ class VoiceRecognitionApp:
             if not self.user_exit_requested:
                 print("🔄 程序意外结束，正在清理...")
             self.stop_recognition()
-    
-    def run_continue_after_interrupt(self):
-        """在KeyboardInterrupt后继续运行"""
-        try:
-            # 继续保持运行
-            while self.is_running:
-                time.sleep(0.1)
-        except KeyboardInterrupt:
-            # 如果在短时间内再次收到KeyboardInterrupt
-            current_time = time.time()
-            self.keyboard_interrupt_count += 1
-            print(f"\n\n👋 正在退出... (用户确认退出，第{self.keyboard_interrupt_count}次KeyboardInterrupt)")
-            self.user_exit_requested = True
-            self.stop_recognition()
 
 
 def main():
     """主函数"""
-    print("🎙️  改进版语音识别应用 - 支持长语音输入")
-    print("=" * 50)
-    print("✅ 使用改进的VAD算法，更好地处理长语音")
-    print("🛡️ 动态噪声基底适应，减少误判")
-    print("🎯 灵活的语音边界检测，支持短暂停顿")
-    print("⚡ 能量平滑处理，提高识别稳定性")
-    print("🔧 优化的参数设置：")
-    print("   - 激活阈值: 0.015 (更容易激活)")
-    print("   - 静音填充: 800ms (更长的容忍时间)")
-    print("   - 最大静音: 1500ms (避免无限等待)")
-    print("💡 适合各种语音输入场景，包括长句子和复杂表达")
-    
-    # 可以设置上下文关键词提高识别准确率
-    contexts = [
-        "停止", "开始", "退出", "刷新", "复制", "粘贴", "剪切", 
-        "撤销", "重做", "保存", "全选", "最小化", "最大化", 
-        "关闭", "切换", "打开", "新建", "截图", "静音"
-    ]
-    
-    # 创建应用实例
-    app = VoiceRecognitionApp(contexts=contexts, enable_commands=True)
+    sys.stdout.write(_BANNER)
+    sys.stdout.flush()
+
+
+    # 创建应用实例（上下文关键词见模块级CONTEXTS）
+    app = VoiceRecognitionApp(contexts=list(CONTEXTS), enable_commands=True)
     
     # 运行应用
     app.run()